@@ -0,0 +1,753 @@
+import os, sys, glob, json, time, random, shutil, platform, tempfile, threading, subprocess, tracemalloc
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+import sqlalchemy
+from sqlalchemy import create_engine
+
+import krx_stock_extraction as kse_module
+from krx_stock_extraction import krx_stock_extraction, krx_db_writer
+
+
+# 성능 비교용 벤치마크 (네트워크 없이 저장된 응답 또는 합성 데이터로 측정)
+# 저장된 응답은 record_fixtures로 한 번 받아두고(--record), 결과는 --results 파일에 쌓아 이전 실행과 비교
+# ex. python krx_benchmark.py --krx-dir fixtures/krx --fnguide-dir fixtures/fnguide --memory --results bench_results.jsonl
+
+# 반복 실행 후 최소 소요시간(초) 반환
+def timeit(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# 1. KRX OutBlock_1 파싱
+
+# 기존 getKRXPrice의 행 단위 파싱 (비교 기준)
+def parse_krx_block_loop(html_jsons, dt):
+    daily = []
+    for html_json in html_jsons:
+        if html_json['TDD_OPNPRC'] == '-':
+            continue
+
+        ISU_SRT_CD = html_json['ISU_SRT_CD']
+        ISU_ABBRV = html_json['ISU_ABBRV']
+        TRD_DD = datetime.strptime(dt,'%Y%m%d').strftime('%Y-%m-%d')
+
+        FLUC_RT = float(html_json['FLUC_RT'].replace(',',''))/100
+        TDD_CLSPRC = int(html_json['TDD_CLSPRC'].replace(',',''))
+        TDD_OPNPRC = int(html_json['TDD_OPNPRC'].replace(',',''))
+        TDD_HGPRC = int(html_json['TDD_HGPRC'].replace(',',''))
+        TDD_LWPRC = int(html_json['TDD_LWPRC'].replace(',',''))
+
+        ACC_TRDVOL = int(html_json['ACC_TRDVOL'].replace(',',''))
+        ACC_TRDVAL = int(html_json['ACC_TRDVAL'].replace(',',''))
+        MKTCAP = int(html_json['MKTCAP'].replace(',',''))
+        LIST_SHRS = int(html_json['LIST_SHRS'].replace(',',''))
+
+        daily.append((ISU_SRT_CD,ISU_ABBRV,TRD_DD,TDD_OPNPRC,TDD_HGPRC,TDD_LWPRC,TDD_CLSPRC,ACC_TRDVOL,FLUC_RT,ACC_TRDVAL,MKTCAP,LIST_SHRS))
+
+    daily = pd.DataFrame(daily)
+    daily.columns = ['stock_code','stock_name','date','open','high','low','close','volume','change','ACC_TRDVAL','MKTCAP','LIST_SHRS']
+    return daily
+
+# 합성 OutBlock_1 생성 (KOSPI+KOSDAQ 하루 약 2,500종목)
+def make_krx_payload(n_rows=2500, seed=0):
+    rng = np.random.default_rng(seed)
+    fmt = '{:,}'.format
+    rows = []
+    for i in range(n_rows):
+        close = int(rng.integers(1000, 500000))
+        rows.append({
+            'ISU_SRT_CD': '{:06d}'.format(i),
+            'ISU_ABBRV': '종목{}'.format(i),
+            'TDD_CLSPRC': fmt(close),
+            'TDD_OPNPRC': '-' if i % 100 == 0 else fmt(int(close * 0.99)),
+            'TDD_HGPRC': fmt(int(close * 1.02)),
+            'TDD_LWPRC': fmt(int(close * 0.98)),
+            'FLUC_RT': '{:.2f}'.format(rng.normal(0, 2)),
+            'ACC_TRDVOL': fmt(int(rng.integers(0, 10**7))),
+            'ACC_TRDVAL': fmt(int(rng.integers(0, 10**11))),
+            'MKTCAP': fmt(int(rng.integers(10**9, 10**14))),
+            'LIST_SHRS': fmt(int(rng.integers(10**5, 10**9))),
+        })
+    return {'OutBlock_1': rows}
+
+# 저장된 KRX 응답 불러오기 (파일명: yyyymmdd.json)
+def load_krx_payloads(path):
+    payloads = {}
+    for fname in sorted(glob.glob(os.path.join(path, '*.json'))):
+        with open(fname, 'rb') as f:
+            payloads[os.path.basename(fname)[0:8]] = json.loads(f.read())
+    return payloads
+
+def bench_krx_parse(payloads, repeat=5):
+    kse = krx_stock_extraction()
+    n_rows = sum(len(p['OutBlock_1']) for p in payloads.values())
+
+    t_loop = timeit(lambda: [parse_krx_block_loop(p['OutBlock_1'], dt) for dt, p in payloads.items()], repeat)
+    t_col = timeit(lambda: [kse.parse_krx_block(p['OutBlock_1'], dt) for dt, p in payloads.items()], repeat)
+
+    # getKRXPrice 전체 (JSON 디코딩 + 파싱 + 이어붙이기/정렬), 요청은 저장된 응답으로 대체
+    raw = {dt: json.dumps(p).encode('utf-8') for dt, p in payloads.items()}
+    empty = json.dumps({'OutBlock_1': []}).encode('utf-8')
+    kse.http_post = lambda url, headers=None, data=None, session=None, ttl=None, cache_if=None: raw.get(data['trdDd'], empty)
+    days = sorted(payloads)
+    t_get = timeit(lambda: kse.getKRXPrice('ALL', days[0], days[-1]), repeat)
+
+    return {'days': len(payloads), 'rows': n_rows, 'loop_sec': t_loop, 'columnar_sec': t_col,
+            'speedup': t_loop / t_col, 'getKRXPrice_sec': t_get}
+
+
+# 2. FnGuide 재무제표 표 추출
+
+FNGUIDE_TABLES = [('divSonikY', 3), ('divSonikQ', 4), ('divDaechaY', 3), ('divDaechaQ', 4), ('divCashY', 3), ('divCashQ', 4)]
+
+# 기존 getIS/getBS/getCF의 셀 단위 find_all 추출 (비교 기준)
+def extract_table_loop(soup, div_id, num_col):
+    table = soup.find(id = div_id)
+    if table is None:
+        return None
+
+    table = table.find_all(['tr'])
+    period = [table[0].find_all('th')[n].get_text() for n in range(1, num_col+1)]
+
+    values = []
+    for i in range(1, len(table)):
+        temps = []
+        for j in range(0, num_col):
+            temp = [float(table[i].find_all('td')[j]['title'].replace(',','').replace('\xa0',''))\
+                if table[i].find_all('td')[j]['title'].replace(',', '').replace('\xa0', '') != '' \
+                else (0 if table[i].find_all('td')[j]['title'].replace(',','').replace('\xa0','') == '-0' \
+                        else 0)]
+            temps.append(temp[0])
+        values.append(temps)
+
+    return period, values
+
+# 합성 SVD_Finance 페이지 생성 (손익 81행, 재무상태 70행, 현금흐름 159행)
+def make_fnguide_page(seed=0):
+    rng = np.random.default_rng(seed)
+    parts = ['<html><head><meta charset="utf-8"></head><body>']
+    for div, n_rows in [('divSonik', 82), ('divDaecha', 70), ('divCash', 159)]:
+        for freq, periods in [('Y', ['2019/12', '2020/12', '2021/12', '2022/09']),
+                              ('Q', ['2021/12', '2022/03', '2022/06', '2022/09', '전년동기'])]:
+            parts.append('<div id="{}{}"><table><thead><tr><th>IFRS(연결)</th>'.format(div, freq))
+            parts += ['<th>{}</th>'.format(p) for p in periods]
+            parts.append('</tr></thead><tbody>')
+            for r in range(n_rows - 1):
+                parts.append('<tr><th><div>항목{}<span>계산에 참여한 계정 펼치기</span></div></th>'.format(r))
+                for v in rng.integers(-10**6, 10**6, len(periods)):
+                    title = '' if v % 17 == 0 else '{:,}.{}'.format(int(v), abs(v) % 10)
+                    parts.append('<td class="r" title="{0}">{0}</td>'.format(title))
+                parts.append('</tr>')
+            parts.append('</tbody></table></div>')
+    parts.append('</body></html>')
+    return ''.join(parts).encode('utf-8')
+
+# 저장된 SVD_Finance 페이지 불러오기 (*.html)
+def load_fnguide_pages(path):
+    pages = []
+    for fname in sorted(glob.glob(os.path.join(path, '*.html'))):
+        with open(fname, 'rb') as f:
+            pages.append(f.read())
+    return pages
+
+def bench_fnguide_parse(pages, repeat=3):
+    kse = krx_stock_extraction()
+
+    def run_loop():
+        for html in pages:
+            soup = BeautifulSoup(html, 'html.parser')
+            for div_id, num_col in FNGUIDE_TABLES:
+                extract_table_loop(soup, div_id, num_col)
+
+    def run_fast():
+        for html in pages:
+            page = lxml_html.fromstring(html)
+            for div_id, num_col in FNGUIDE_TABLES:
+                kse.extract_table(page, div_id, num_col)
+
+    # getIS/getBS/getCF와 같은 파싱 (표 추출 + 데이터프레임 구성, 연간/분기)
+    def run_statements():
+        for i, html in enumerate(pages):
+            kse.parse_financial_statements(lxml_html.fromstring(html), '{:06d}'.format(i), 'CONSOLIDATED')
+
+    t_loop = timeit(run_loop, repeat)
+    t_fast = timeit(run_fast, repeat)
+    t_statements = timeit(run_statements, repeat)
+
+    return {'pages': len(pages), 'loop_sec_per_page': t_loop / len(pages),
+            'fast_sec_per_page': t_fast / len(pages), 'speedup': t_loop / t_fast,
+            'statements_sec_per_page': t_statements / len(pages)}
+
+
+# 3. DB 저장
+
+# 합성 일봉 (n_days일 x n_codes종목)
+def make_price_frame(n_days=20, n_codes=2500):
+    kse = krx_stock_extraction()
+    days = pd.bdate_range('2022-01-03', periods=n_days).strftime('%Y%m%d')
+    return pd.concat([kse.parse_krx_block(make_krx_payload(n_codes, seed=i)['OutBlock_1'], dt) for i, dt in enumerate(days)],
+                     ignore_index=True)
+
+# 기존 to_sql(append) 대비 krx_db_writer(upsert) 저장 속도(rows/sec)
+# url이 없으면 임시 sqlite 파일 사용
+def bench_db_writer(df, url=None):
+    tmpdir = None
+    if url is None:
+        tmpdir = tempfile.mkdtemp()
+        url = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+
+    dtype = {'stock_code': sqlalchemy.types.VARCHAR(10), 'date': sqlalchemy.types.DATE()}
+    df = df.assign(date=pd.to_datetime(df['date']).dt.date)
+
+    engine = create_engine(url)
+    t0 = time.perf_counter()
+    df.to_sql(name='bench_append', con=engine, if_exists='replace', index=False, dtype=dtype)
+    t_append = time.perf_counter() - t0
+    engine.dispose()
+
+    writer = krx_db_writer(url)
+    with writer.engine.begin() as conn:
+        conn.exec_driver_sql('DROP TABLE IF EXISTS bench_upsert')
+    t0 = time.perf_counter()
+    writer.write(df, 'bench_upsert', ['stock_code', 'date'], dtype)
+    t_insert = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    writer.write(df, 'bench_upsert', ['stock_code', 'date'], dtype) # 재적재 (중복 없이 갱신)
+    t_reload = time.perf_counter() - t0
+
+    with writer.engine.connect() as conn:
+        n_stored = conn.exec_driver_sql('SELECT COUNT(*) FROM bench_upsert').scalar()
+    writer.dispose()
+
+    return {'rows': len(df), 'to_sql_rows_per_sec': len(df) / t_append,
+            'upsert_rows_per_sec': len(df) / t_insert, 'reload_rows_per_sec': len(df) / t_reload,
+            'idempotent': n_stored == len(df)}
+
+
+# 4. 분기 가격 집계
+
+# 기존 get_price의 종목별 반복 집계 (비교 기준, 연쇄 대입 대신 .loc 사용)
+def aggregate_ohlc_loop(df, df2, period):
+    df = df.sort_values(by=['Code', 'Date'], axis=0)
+    df2 = df2.sort_values(by=['stock_code', 'date'], axis=0)
+
+    df[['Open', 'High', 'Low', 'Close']] = df[['Open', 'High', 'Low', 'Close']].replace(0, np.nan)
+    df['Open'] = np.where(pd.notnull(df['Open']) == True, df['Open'], df['Close'])
+    df['High'] = np.where(pd.notnull(df['High']) == True, df['High'], df['Close'])
+    df['Low'] = np.where(pd.notnull(df['Low']) == True, df['Low'], df['Close'])
+
+    groups = df.groupby('Code')
+
+    df_ohlc = pd.DataFrame()
+    df_ohlc['high'] = groups.max()['High']
+    df_ohlc['low'] = groups.min()['Low']
+    df_ohlc['period'] = period
+    df_ohlc['open'], df_ohlc['close'], df_ohlc['volume'] = np.nan, np.nan, np.nan
+    df_ohlc['시가총액'], df_ohlc['상장주식수'] = np.nan, np.nan
+
+    df_ohlc['stock_code'] = df_ohlc.index
+    df_ohlc = df_ohlc.reset_index(drop=True)
+
+    for i in range(len(df_ohlc)):
+        code = df_ohlc.loc[i, 'stock_code']
+        df_ohlc.loc[i, 'open'] = float(df[df['Code']==code].head(1)['Open'].iloc[0])
+        df_ohlc.loc[i, 'close'] = float(df[df['Code']==code].tail(1)['Close'].iloc[0])
+        df_ohlc.loc[i, 'volume'] = float(df[df['Code']==code].tail(1)['Volume'].iloc[0])
+        if not df2[df2['stock_code']==code].tail(1).empty:
+            df_ohlc.loc[i, '시가총액'] = float(df2[df2['stock_code']==code].tail(1)['MKTCAP'].iloc[0])
+            df_ohlc.loc[i, '상장주식수'] = float(df2[df2['stock_code']==code].tail(1)['LIST_SHRS'].iloc[0])
+
+    return df_ohlc[['stock_code', 'period', 'open', 'high', 'low', 'close', 'volume', '시가총액', '상장주식수']]
+
+# 합성 분기 수정주가/비수정주가 (n_codes종목 x 한 분기 거래일)
+def make_quarter_frames(n_codes=2500, start='2022-07-01', end='2022-09-30', seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end).strftime('%Y-%m-%d')
+    codes = ['{:06d}'.format(i) for i in range(n_codes)]
+    n = len(days) * n_codes
+
+    close = rng.integers(1000, 500000, n).astype('float64')
+    df = pd.DataFrame({'Date': np.repeat(days, n_codes), 'Code': np.tile(codes, len(days)),
+                       'Open': np.where(rng.random(n) < 0.01, 0, close * 0.99).round(),
+                       'High': (close * 1.02).round(), 'Low': (close * 0.98).round(), 'Close': close,
+                       'Volume': rng.integers(0, 10**7, n), 'Change': rng.normal(0, 0.02, n)})
+    df2 = pd.DataFrame({'stock_code': codes[: n_codes - n_codes // 50], 'date': days[-1]})
+    df2['LIST_SHRS'] = rng.integers(10**5, 10**9, len(df2))
+    df2['MKTCAP'] = rng.integers(10**9, 10**14, len(df2))
+    return df, df2
+
+def bench_get_price_aggregation(n_codes=2500, repeat=1):
+    kse = krx_stock_extraction()
+    period = '2022/09'
+    df, df2 = make_quarter_frames(n_codes)
+
+    t_loop = timeit(lambda: aggregate_ohlc_loop(df.copy(), df2.copy(), period), repeat)
+    t_vec = timeit(lambda: kse.aggregate_ohlc(df.assign(period=period), df2.assign(period=period)), repeat)
+
+    legacy = aggregate_ohlc_loop(df.copy(), df2.copy(), period).sort_values('stock_code').reset_index(drop=True)
+    fast = kse.aggregate_ohlc(df.assign(period=period), df2.assign(period=period))
+    same = np.allclose(legacy.iloc[:, 2:].astype('float64'), fast.iloc[:, 2:], equal_nan=True) \
+        and (legacy['stock_code'] == fast['stock_code']).all()
+
+    return {'rows': len(df), 'codes': n_codes, 'loop_sec': t_loop, 'vectorized_sec': t_vec,
+            'speedup': t_loop / t_vec, 'same_result': bool(same)}
+
+
+# 5. 수정주가 수집
+
+# 기존 get_adjusted_KRXPrice의 순차 수집 (비교 기준, 매 종목마다 전체 프레임을 다시 복사)
+def get_adjusted_KRXPrice_loop(stock_list, st_dt, end_dt, reader):
+    daily = pd.DataFrame()
+    for code, name in stock_list[['Symbol', 'Name']].values:
+        ohlcv = reader(code, st_dt, end_dt)
+        ohlcv['Code'] = code
+        ohlcv['Name'] = name
+        daily = pd.concat([daily, ohlcv])
+
+    daily['Date'] = daily.index
+    daily = daily.reset_index(drop=True)
+    return daily
+
+# 네트워크 대신 latency(초)만큼 기다린 뒤 합성 일봉을 돌려주는 fdr.DataReader 대체
+def make_fdr_reader(st_dt, end_dt, latency=0.05):
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range(st_dt, end_dt, name='Date')
+    close = rng.integers(1000, 500000, len(index)).astype('int64')
+    base = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                         'Volume': rng.integers(0, 10**7, len(index)), 'Change': rng.normal(0, 0.02, len(index))}, index=index)
+
+    def reader(code, st_dt, end_dt):
+        time.sleep(latency)
+        ohlcv = base.copy()
+        ohlcv['Close'] = ohlcv['Close'] + int(code)
+        return ohlcv
+    return reader
+
+# 소요시간(초)과 최대 메모리 사용량(MB)
+# tracemalloc은 실행을 크게 느리게 하므로 시간은 따로 한 번 더 실행해서 측정
+def measure(func):
+    t0 = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_adjusted_price(n_codes=1000, st_dt='2020-01-01', end_dt='2022-12-31', workers=8, latency=0.05):
+    kse = krx_stock_extraction()
+    # 수집 방식만 비교하도록 속도 제한 없이 workers개를 동시에 요청
+    kse.scheduler = kse_module.krx_scheduler(rate=None, concurrency=workers, max_concurrency=workers)
+    stock_list = pd.DataFrame({'Symbol': ['{:06d}'.format(i) for i in range(n_codes)],
+                               'Name': ['종목{}'.format(i) for i in range(n_codes)]})
+    reader = make_fdr_reader(st_dt, end_dt, latency)
+
+    legacy, t_loop, m_loop = measure(lambda: get_adjusted_KRXPrice_loop(stock_list, st_dt, end_dt, reader))
+
+    fdr_reader = kse_module.fdr.DataReader
+    kse_module.fdr.DataReader = reader
+    try:
+        (fast, errors), t_pool, m_pool = measure(lambda: kse.harvest_adjusted_KRXPrice(None, st_dt, end_dt, stock_list, workers))
+    finally:
+        kse_module.fdr.DataReader = fdr_reader
+
+    same = len(errors) == 0 and np.array_equal(legacy['Close'].to_numpy(), fast['Close'].to_numpy()) \
+        and (legacy['Code'].to_numpy() == fast['Code'].astype(str).to_numpy()).all()
+
+    return {'codes': n_codes, 'rows': len(fast), 'loop_sec': t_loop, 'pool_sec': t_pool, 'speedup': t_loop / t_pool,
+            'loop_peak_mb': m_loop, 'pool_peak_mb': m_pool,
+            'loop_frame_mb': legacy.memory_usage(deep=True).sum() / 2**20,
+            'pool_frame_mb': fast.memory_usage(deep=True).sum() / 2**20, 'same_result': bool(same)}
+
+
+# 6. 종목 선택
+
+# 기존 stock_select (한 기간씩, 비교 기준)
+def stock_select_loop(df_factor, MKTCAP_top, n, factor_list):
+    basic_list = ['stock_code', 'period', '시가총액']
+    basic_list.extend(factor_list)
+
+    df_select = df_factor.copy()
+    df_select = df_select[basic_list]
+    df_select['score'] = 0
+
+    df_select = df_select.sort_values(by=['시가총액'], ascending=False).head(int(len(df_select) * MKTCAP_top))
+    df_select = df_select.dropna()
+
+    for i in range(len(factor_list)):
+        df_select[factor_list[i] + '_score'] = (df_select[factor_list[i]] - max(df_select[factor_list[i]]))
+        df_select[factor_list[i] + '_score'] = df_select[factor_list[i] + '_score']/min(df_select[factor_list[i] + '_score'])
+        df_select['score'] += (df_select[factor_list[i] + '_score'] / len(factor_list))
+
+    df_select = df_select.sort_values(by=['score'], ascending=False).head(n)
+    return list(df_select['stock_code'])
+
+# 합성 팩터 패널 (n_years년 분기 x n_codes종목, 팩터 일부 결측)
+def make_factor_panel(n_years=10, n_codes=2500, seed=0):
+    rng = np.random.default_rng(seed)
+    periods = ['{}/{:02d}'.format(y, m) for y in range(2013, 2013 + n_years) for m in (3, 6, 9, 12)]
+    n = len(periods) * n_codes
+    df = pd.DataFrame({'stock_code': np.tile(['{:06d}'.format(i) for i in range(n_codes)], len(periods)),
+                       'period': np.repeat(periods, n_codes),
+                       '시가총액': rng.lognormal(25, 2, n)})
+    for factor in ['PER', 'PBR', 'PSR', 'ROE']:
+        df[factor] = np.where(rng.random(n) < 0.05, np.nan, rng.lognormal(2, 1, n))
+    return df
+
+def bench_stock_select(MKTCAP_top=0.2, n=30, factor_list=('PER', 'PBR', 'PSR'), repeat=3):
+    kse = krx_stock_extraction()
+    df = make_factor_panel()
+    factor_list = list(factor_list)
+
+    def run_loop():
+        return {period: stock_select_loop(g, MKTCAP_top, n, factor_list) for period, g in df.groupby('period')}
+
+    t_loop = timeit(run_loop, repeat)
+    t_batch = timeit(lambda: kse.stock_select_batch(df, MKTCAP_top, n, factor_list), repeat)
+
+    legacy = run_loop()
+    batch = kse.stock_select_batch(df, MKTCAP_top, n, factor_list)
+    same = all(batch.loc[batch['period'] == period, 'stock_code'].tolist() == codes for period, codes in legacy.items())
+
+    return {'periods': df['period'].nunique(), 'rows': len(df), 'loop_sec': t_loop, 'batch_sec': t_batch,
+            'speedup': t_loop / t_batch, 'same_result': bool(same)}
+
+
+# getPER/getPBR (한 분기 전체 종목의 손익계산서/재무상태표를 한 번에 불러와 결합)
+# 재무제표는 임시 parquet 저장소에 저장 (DB 서버 없이 조회 경로까지 포함해서 측정)
+def bench_factor_ratios(n_codes=2500, period='2022/09', repeat=3):
+    kse = krx_stock_extraction()
+    rng = np.random.default_rng(0)
+    codes = ['{:06d}'.format(i) for i in range(n_codes)]
+    tmpdir = tempfile.mkdtemp()
+    server = 'parquet://' + tmpdir
+    try:
+        for fsid in ('is', 'bs'):
+            rename, _ = kse.statement_columns(fsid)
+            items = {col: rng.normal(1000, 500, n_codes).round() for col in rename if col != 'Operating_Profit_Total'}
+            kse.save_financial_statement(pd.DataFrame(dict({'stock_code': codes, 'period': period, 'rpt_type': 'CONSOLIDATED_Q'}, **items)),
+                                         fsid, 'consolidated', 'q', server, None, None, None)
+
+        df_factor = pd.DataFrame({'stock_code': codes, 'period': period,
+                                  'close': rng.integers(1000, 500000, n_codes).astype('float64'),
+                                  '상장주식수': rng.integers(10**5, 10**9, n_codes).astype('float64')})
+        t_per = timeit(lambda: kse.getPER(df_factor, period, server, None, None, None, None), repeat)
+        t_pbr = timeit(lambda: kse.getPBR(df_factor, period, server, None, None, None, None), repeat)
+        df = kse.getPBR(kse.getPER(df_factor, period, server, None, None, None, None), period, server, None, None, None, None)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return {'codes': n_codes, 'getPER_sec': t_per, 'getPBR_sec': t_pbr,
+            'per_coverage': float(df['PER'].notna().mean()), 'pbr_coverage': float(df['PBR'].notna().mean())}
+
+
+# 7. 백테스트
+
+# 합성 수정종가 행렬 (n_years년 영업일 x n_codes종목)
+def make_close_matrix(n_years=10, n_codes=2500, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2013-01-01', periods=n_years * 261)
+    codes = ['{:06d}'.format(i) for i in range(n_codes)]
+    close = np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), n_codes)), axis=0)) * 10000
+    return pd.DataFrame(close, index=dates, columns=codes)
+
+# 리밸런싱마다 종목별 종가를 잘라서 계산하는 방식 (get_price_backtest를 종목마다 부르던 흐름, 비교 기준)
+def backtest_loop(close, schedule, dates):
+    prices = close.ffill()
+    nav, navs = 1.0, []
+    for i, (period, start) in enumerate(zip(schedule, dates)):
+        end = dates[i+1] if i+1 < len(dates) else None
+        seg = pd.concat([prices.loc[start:end, code] for code in schedule[period]], axis=1)
+        values = (seg / seg.iloc[0]).mean(axis=1) * nav
+        nav = values.iloc[-1] # 다음 리밸런싱 날 종가까지 보유
+        if end is not None: # 그 날부터는 다음 구간
+            values = values.iloc[:-1]
+        navs.append(values)
+    return pd.concat(navs)
+
+def bench_backtest(n=30, repeat=3):
+    kse = krx_stock_extraction()
+    close = make_close_matrix()
+    panel = make_factor_panel()
+    picks = kse.stock_select_batch(panel, 0.2, n, ['PER', 'PBR'])
+    schedule = {period: g['stock_code'].tolist() for period, g in picks.groupby('period')}
+
+    def run():
+        bt = kse_module.krx_backtester(close)
+        return bt.run(schedule)
+
+    t_vec = timeit(run, repeat)
+    daily, rebalance = run()
+    t_loop = timeit(lambda: backtest_loop(close, schedule, list(rebalance['date'])), repeat)
+    legacy = backtest_loop(close, schedule, list(rebalance['date']))
+
+    return {'dates': len(close), 'codes': close.shape[1], 'rebalances': len(rebalance), 'loop_sec': t_loop,
+            'vectorized_sec': t_vec, 'speedup': t_loop / t_vec,
+            'same_result': bool(np.allclose(legacy.to_numpy(), daily['nav'].to_numpy()))}
+
+
+# 8. 파라미터 스윕
+
+def bench_sweep(workers=None):
+    close = make_close_matrix()
+    panel = make_factor_panel()
+    grid = {'MKTCAP_top': [0.1, 0.2, 0.5], 'n': [10, 20, 30, 50], 'factor_list': [['PER'], ['PBR'], ['PER', 'PBR'], ['PER', 'PBR', 'PSR']]}
+    workers = workers or os.cpu_count()
+
+    with kse_module.krx_sweep(panel, close) as sweep:
+        shared_mb = sum(shm.size for shm in sweep.blocks.values()) / 2**20
+        t0 = time.perf_counter()
+        serial = sweep.run(grid, workers=1)
+        t_serial = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        parallel = sweep.run(grid, workers=workers)
+        t_parallel = time.perf_counter() - t0
+
+    return {'configs': len(parallel), 'workers': workers, 'serial_sec': t_serial, 'parallel_sec': t_parallel,
+            'speedup': t_serial / t_parallel, 'shared_mb': shared_mb,
+            'same_result': bool(np.allclose(serial['total_return'], parallel['total_return']))}
+
+
+# 9. 요청 스케줄러
+
+# 지연과 실패를 주입하는 로컬 HTTP 서버 (네트워크 없이 krx_scheduler 동작 확인)
+# latency: 기본 응답시간(초), 처리 중인 요청이 capacity에 가까울수록 느려지고 넘으면 429 (Retry-After: retry_after초)
+# fail_rate: 임의로 503을 돌려줄 비율
+# ex. with stub_server(latency=0.05, capacity=8, fail_rate=0.02) as url: kse.scheduler.request('GET', url)
+class stub_server:
+    def __init__(self, latency=0.05, capacity=8, fail_rate=0.0, retry_after=0.1, seed=0) -> None:
+        self.latency = latency
+        self.capacity = capacity
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.counts = {200: 0, 429: 0, 503: 0}
+
+    def handle(self, handler):
+        with self.lock:
+            self.in_flight += 1
+            load = self.in_flight
+            fail = self.random.random() < self.fail_rate
+        try:
+            if load > self.capacity:
+                status = 429
+            elif fail:
+                status = 503
+            else:
+                status = 200
+                time.sleep(self.latency * (1 + 4 * max(0, load - self.capacity / 2) / self.capacity))
+            body = b'ok' if status == 200 else b'busy'
+            handler.send_response(status)
+            if status == 429:
+                handler.send_header('Retry-After', str(self.retry_after))
+            handler.send_header('Content-Length', str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.counts[status] += 1
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return 'http://127.0.0.1:{}/'.format(self.server.server_address[1])
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+# 고정 스레드 수로 재시도 없이 요청 (비교 기준) vs krx_scheduler (AIMD 동시 요청 수 + 백오프 재시도)
+def bench_scheduler(n_requests=400, workers=32, latency=0.05, capacity=8, fail_rate=0.02):
+    def run(get):
+        def one(i):
+            try:
+                get()
+                return True
+            except Exception:
+                return False
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ok = sum(pool.map(one, range(n_requests)))
+        return ok, time.perf_counter() - t0
+
+    with stub_server(latency, capacity, fail_rate) as url:
+        session = requests.Session()
+        session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=workers))
+        ok_naive, t_naive = run(lambda: session.get(url, timeout=10).raise_for_status())
+
+    scheduler = kse_module.krx_scheduler(rate=None, concurrency=2, max_concurrency=workers, retries=5, backoff=0.05)
+    with stub_server(latency, capacity, fail_rate) as url:
+        ok_sched, t_sched = run(lambda: scheduler.request('GET', url))
+        state = scheduler.state()[url.split('/')[2]]
+
+    return {'requests': n_requests, 'naive_ok': ok_naive, 'naive_sec': t_naive,
+            'scheduled_ok': ok_sched, 'scheduled_sec': t_sched, 'scheduled_ok_per_sec': ok_sched / t_sched,
+            'retries': state['retries'], 'final_concurrency': state['limit']}
+
+
+# 10. 실행/기록
+
+# 실제 응답을 벤치마크용 파일로 저장 (네트워크 필요, 한 번만 실행)
+# krx_dir: {yyyymmdd}.json (KRX 전종목 일봉 응답), fnguide_dir: {종목코드}.html (SVD_Finance 페이지)
+def record_fixtures(krx_dir=None, fnguide_dir=None, days=(), codes=(), mktId='ALL', rpt_type='CONSOLIDATED'):
+    kse = krx_stock_extraction()
+    if krx_dir is not None:
+        os.makedirs(krx_dir, exist_ok=True)
+        post = kse.http_post
+        for dt in days:
+            captured = {}
+            kse.http_post = lambda url, headers=None, data=None, session=None, ttl=None, cache_if=None: captured.setdefault('raw', post(url, headers, data, session, ttl, cache_if))
+            kse.getKRXPriceDay(mktId, dt)
+            with open(os.path.join(krx_dir, dt + '.json'), 'wb') as f:
+                f.write(captured['raw'])
+    if fnguide_dir is not None:
+        os.makedirs(fnguide_dir, exist_ok=True)
+        for code in codes:
+            with open(os.path.join(fnguide_dir, code + '.html'), 'wb') as f:
+                f.write(kse.get_financial_html(code, rpt_type))
+
+# 실행할 벤치마크 (이름 -> 함수), 실행 순서대로
+def benchmarks(payloads, pages, db_url=None, repeat=5):
+    return {
+        'krx_parse': lambda: bench_krx_parse(payloads, repeat),
+        'fnguide_parse': lambda: bench_fnguide_parse(pages, repeat),
+        'db_writer': lambda: bench_db_writer(make_price_frame(), db_url),
+        'get_price_aggregation': bench_get_price_aggregation,
+        'adjusted_price': bench_adjusted_price,
+        'factor_ratios': bench_factor_ratios,
+        'stock_select': bench_stock_select,
+        'backtest': bench_backtest,
+        'sweep': bench_sweep,
+        'scheduler': bench_scheduler,
+    }
+
+# 벤치마크 실행 (memory=True면 tracemalloc으로 최대 메모리(peak_mb)도 측정, 한 번 더 실행하므로 느려짐)
+def run_suite(suite, only=None, memory=False):
+    results = {}
+    for name, func in suite.items():
+        if only and name not in only:
+            continue
+        result = func()
+        if memory: # 시간은 tracemalloc 없이 잰 값을 유지
+            _, _, peak = measure(func)
+            result = dict(result, peak_mb=peak)
+        results[name] = result
+        print(name, result)
+    return results
+
+# 실행 결과를 JSON lines 파일에 추가 (실행 시각, 커밋, 환경 함께 기록)
+def save_results(path, results):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    record = {'time': datetime.now().isoformat(timespec='seconds'), 'commit': commit, 'python': platform.python_version(),
+              'pandas': pd.__version__, 'numpy': np.__version__, 'machine': platform.machine(), 'results': results}
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False, default=lambda v: v.item() if hasattr(v, 'item') else str(v)) + '\n')
+    return record
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# 이전 실행 대비 소요시간(*_sec, *_sec_per_page)/메모리(*_mb)/처리량(*_per_sec) 비교
+# ratio: 나빠진 배수 (시간/메모리는 after/before, 처리량은 before/after), threshold 이상이면 regression
+def compare_results(previous, current, threshold=1.2):
+    rows = []
+    for name, result in current.items():
+        before = previous.get(name, {})
+        for key, value in result.items():
+            if key not in before or not isinstance(value, (int, float)) or not isinstance(before[key], (int, float)):
+                continue
+            if value <= 0 or before[key] <= 0:
+                continue
+            if key.endswith('_per_sec'): # 높을수록 좋음
+                ratio = before[key] / value
+            elif key.endswith('_sec') or key.endswith('_sec_per_page') or key.endswith('_mb'):
+                ratio = value / before[key]
+            else:
+                continue
+            rows.append({'benchmark': name, 'metric': key, 'before': before[key], 'after': value, 'ratio': ratio,
+                         'regression': ratio >= threshold})
+    return pd.DataFrame(rows, columns=['benchmark', 'metric', 'before', 'after', 'ratio', 'regression'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--krx-dir', help='저장된 KRX 응답(yyyymmdd.json) 폴더')
+    parser.add_argument('--fnguide-dir', help='저장된 SVD_Finance 페이지(*.html) 폴더')
+    parser.add_argument('--db-url', help='DB 저장 벤치마크용 sqlalchemy url (기본: 임시 sqlite)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='실행할 벤치마크 (쉼표로 구분, ex. krx_parse,stock_select)')
+    parser.add_argument('--memory', action='store_true', help='벤치마크별 최대 메모리 사용량도 측정')
+    parser.add_argument('--results', help='결과를 추가할 JSON lines 파일 (직전 실행 결과와 비교)')
+    parser.add_argument('--threshold', type=float, default=1.2, help='이 비율 이상 느려지면 regression으로 표시')
+    parser.add_argument('--record', action='store_true', help='--krx-dir/--fnguide-dir에 실제 응답을 저장 (네트워크 필요)')
+    parser.add_argument('--days', default='', help='--record로 저장할 거래일 (쉼표로 구분, yyyymmdd)')
+    parser.add_argument('--codes', default='', help='--record로 저장할 종목코드 (쉼표로 구분)')
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.krx_dir, args.fnguide_dir, [d for d in args.days.split(',') if d], [c for c in args.codes.split(',') if c])
+        sys.exit(0)
+
+    if args.krx_dir:
+        payloads = load_krx_payloads(args.krx_dir)
+    else:
+        payloads = {'2022060{}'.format(d): make_krx_payload(seed=d) for d in range(2, 4)}
+
+    if args.fnguide_dir:
+        pages = load_fnguide_pages(args.fnguide_dir)
+    else:
+        pages = [make_fnguide_page(seed) for seed in range(5)]
+
+    only = [name for name in (args.only or '').split(',') if name]
+    results = run_suite(benchmarks(payloads, pages, args.db_url, args.repeat), only, args.memory)
+
+    if args.results:
+        history = load_results(args.results)
+        save_results(args.results, results)
+        if len(history) > 0:
+            diff = compare_results(history[-1]['results'], results, args.threshold)
+            print('\ncompared with {} ({})'.format(history[-1]['time'], history[-1]['commit']))
+            print(diff.to_string(index=False))
+            if diff['regression'].any():
+                print('\nregression: ' + ', '.join('{}.{}'.format(b, m) for b, m in diff.loc[diff['regression'], ['benchmark', 'metric']].values))